@@ -1,5 +1,14 @@
+import asyncio
+import logging
+import threading
+import time
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Iterable
+from uuid import UUID
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Union, Callable
 
 # ─── MPORTS (2025-Q3 alpaca-py) ───────────────────────────────────────
 from alpaca.trading.client import TradingClient
@@ -8,7 +17,16 @@ from alpaca.trading.requests import (
     GetAssetsRequest,
     OrderRequest,
 )
-from alpaca.trading.enums import OrderSide, OrderType, TimeInForce
+from alpaca.trading.models import Order
+from alpaca.trading.enums import (
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    TimeInForce,
+    TradeEvent,
+)
+from alpaca.trading.stream import TradingStream
+from alpaca.common.exceptions import APIError
 
 #  ↓↓↓ Stock request models live here:
 from alpaca.data.requests import StockBarsRequest
@@ -22,6 +40,7 @@ from alpaca.data.live import StockDataStream
 from alpaca.data.historical     import StockHistoricalDataClient
 from alpaca.data.live           import StockDataStream
 from alpaca.data.timeframe      import TimeFrame, TimeFrameUnit
+from alpaca.common.enums        import Sort
 from alpaca.data.requests       import (
     StockBarsRequest,
     StockLatestQuoteRequest,
@@ -29,10 +48,193 @@ from alpaca.data.requests       import (
 )
 # ──────────────────────────────────────────────────────────────────────────────
 
+import numpy as np
+import pandas as pd
+
+# ─── HTTP transport (shared keep-alive pool) ──────────────────────────────────
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from urllib3.util.retry import Retry
+
+try:                    # optional: HTTP/2 multiplexing for submit_orders
+    import httpx
+    import h2           # noqa: F401  (httpx needs it for http2=True)
+except ImportError:
+    httpx = None
+
+try:                    # optional: libuv event loop for the streaming threads
+    import uvloop
+except ImportError:
+    uvloop = None
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+
+
+__all__ = ["SimpleAlpaca", "RateLimited"]
+
+log = logging.getLogger(__name__)
+
+# Alpaca accepts up to 200 symbols in a single market-data request
+_MAX_SYMBOLS_PER_REQUEST = 200
+
+# '5Min' / '1Hour' / '1Day' → TimeFrame, keyed on the unit's first 3 letters
+_TF_RE = re.compile(r"(\d+)\s*([A-Za-z]+)")
+_UNIT_MAP = {
+    "min": TimeFrameUnit.Minute,
+    "hou": TimeFrameUnit.Hour,
+    "day": TimeFrameUnit.Day,
+    "wee": TimeFrameUnit.Week,
+    "mon": TimeFrameUnit.Month,
+}
+
+# How long fetched bars are reused, by timeframe unit (seconds)
+_BAR_CACHE_TTL = {
+    TimeFrameUnit.Minute: 5 * 60,
+    TimeFrameUnit.Hour: 30 * 60,
+    TimeFrameUnit.Day: 60 * 60,
+    TimeFrameUnit.Week: 60 * 60,
+    TimeFrameUnit.Month: 60 * 60,
+}
+_BAR_CACHE_SIZE = 256
+
+# Order-argument lookup tables for _side / _tif
+_SIDES = {"b": OrderSide.BUY, "s": OrderSide.SELL}
+_TIFS = {**{t.value: t for t in TimeInForce},
+         **{t.value.upper(): t for t in TimeInForce}}
+
+# Column layout returned by get_historical_bars_df(as_array=True)
+_BAR_DTYPE = np.dtype([("t", "datetime64[ns]"), ("o", "f8"), ("h", "f8"),
+                       ("l", "f8"), ("c", "f8"), ("v", "f8")])
+
+
+# ─── JSON conversion (one converter resolved per concrete type) ───────────────
+def _identity(obj):
+    return obj
+
+
+def _model_dump(obj):                           # pydantic BaseModel
+    return obj.model_dump()
+
+
+def _from_iterable(obj):
+    # Raw* containers: convert to dict recursively
+    try:
+        return {k: _to_json(v) for k, v in dict(obj).items()}
+    except Exception:
+        return _from_attrs(obj)
+
+
+def _from_attrs(obj):
+    return obj.__dict__ if hasattr(obj, "__dict__") else obj
+
+
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    t: _identity for t in (dict, list, str, int, float, bool, type(None))
+}
+
+
+def _resolve_converter(t: type) -> Callable[[Any], Any]:
+    if hasattr(t, "model_dump"):
+        return _model_dump
+    if issubclass(t, (dict, list, str, int, float, bool)):
+        return _identity
+    if hasattr(t, "__iter__"):
+        return _from_iterable
+    return _from_attrs
+
+
+def _to_json(obj):
+    t = type(obj)
+    fn = _CONVERTERS.get(t)
+    if fn is None:
+        fn = _CONVERTERS[t] = _resolve_converter(t)
+    return fn(obj)
+
+
+# ─── client-side rate limiting ────────────────────────────────────────────────
+class RateLimited(Exception):
+    """
+    Raised instead of blocking when the local request budget is spent.
+    `retry_after` is the number of seconds until enough budget refills.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry in {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, n: float = 1) -> None:
+        """Spend `n` tokens or raise RateLimited (spending nothing)."""
+        if n > self.capacity:
+            raise ValueError(f"{n} requests exceed the bucket capacity "
+                             f"of {self.capacity}; split the batch")
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            if self._tokens < n:
+                raise RateLimited((n - self._tokens) / self.rate)
+            self._tokens -= n
+
+
+def _run_loop(coro):
+    """
+    asyncio.run() on a fresh loop — uvloop's when installed, which handles
+    high-rate bar/quote streams (and the queue hand-off behind them) with
+    fewer syscalls per message.  Never touches the global loop policy.
+    """
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+class _Retry(Retry):
+    """
+    urllib3 Retry that also retries non-idempotent methods on 429: a
+    rate-limited order was rejected before it was placed, so re-sending
+    it cannot duplicate it.
+    """
 
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
 
 
-__all__ = ["SimpleAlpaca"]
+def _build_session() -> requests.Session:
+    """
+    One keep-alive connection pool shared by the trading and data clients,
+    so repeated REST calls reuse TCP/TLS sockets instead of re-handshaking.
+    """
+    session = requests.Session()
+    # 5xx is retried for idempotent methods only, so a POST that may have
+    # reached the server is never re-sent; 429 is retried for every method.
+    # The last failed response is handed back so alpaca-py raises APIError.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=_Retry(total=5,
+                           backoff_factor=0.5,
+                           backoff_jitter=0.25,
+                           status_forcelist=[429, 500, 502, 503, 504],
+                           respect_retry_after_header=True,
+                           raise_on_status=False))
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
 
 
 class SimpleAlpaca:
@@ -51,7 +253,9 @@ class SimpleAlpaca:
                  api_key: str,
                  secret_key: str,
                  paper: bool = True,
-                 raw_data: bool = False):
+                 raw_data: bool = False,
+                 account_ttl: float = 1.0,
+                 requests_per_minute: int | None = None):
         """
         Parameters
         ----------
@@ -61,60 +265,142 @@ class SimpleAlpaca:
                        False -> live trading (be careful!)
         raw_data     : if True, returns original Alpaca objects;
                        if False (default) returns dict / JSON-friendly versions
+        account_ttl  : seconds to reuse a fetched account before re-querying
+                       (0 disables the cache)
+        requests_per_minute : opt-in local budget, applied separately to
+                       trading-API and market-data calls; exceeding it
+                       raises RateLimited (None, the default, disables)
         """
         self.raw = raw_data
 
-        # Trading & account client
-        self._trade = TradingClient(api_key, secret_key, paper=paper)
+        # REST clients and their session are built on first use
+        self._api_key = api_key
+        self._secret = secret_key
+        self._paper = paper
+
+        # (symbol, timeframe, start, end, limit) -> (fetched_at, [Bar, ...])
+        self._bar_cache: OrderedDict[tuple, tuple[float, list]] = OrderedDict()
+        self._bar_lock = threading.Lock()
+
+        # (side, type, tif) -> validated OrderRequest template
+        self._tpl_cache: Dict[tuple, OrderRequest] = {}
 
-        # Historical (REST) data client
-        self._hist = StockHistoricalDataClient(api_key, secret_key)
+        # Pre-emptive QPS shaping; Alpaca meters trading and data separately
+        self._trade_bucket = self._data_bucket = None
+        if requests_per_minute:
+            self._trade_bucket = TokenBucket(rate=requests_per_minute / 60,
+                                             capacity=requests_per_minute)
+            self._data_bucket = TokenBucket(rate=requests_per_minute / 60,
+                                            capacity=requests_per_minute)
 
-        # WebSocket stream (create on demand)
+        # (fetched_at, Account) reused by cash() / buying_power() / repr
+        self._acct_ttl = account_ttl
+        self._acct_cache: tuple[float, Any] | None = None
+
+        # WebSocket stream (create on demand), run on its own loop thread
         self._ws: Optional[StockDataStream] = None
-        self._api_key = api_key
-        self._secret = secret_key
+        self._ws_thread: Optional[threading.Thread] = None
+        self._ws_lock = threading.Lock()
+        self._ws_callbacks: Dict[str, Callable] = {}
+        self._ws_queue: Optional[asyncio.Queue] = None
+        self._ws_sends: set = set()
+
+        # Trade-updates stream (started by wait_for_fill) and its waiters
+        self._trade_stream: Optional[TradingStream] = None
+        self._fill_lock = threading.Lock()
+        self._fill_waiters: Dict[UUID, threading.Event] = {}
+        self._fill_results: Dict[UUID, str] = {}
+
+    # -------- lazily-built REST clients & workers ----------
+    @cached_property
+    def _session(self) -> requests.Session:
+        # Both clients share one pooled session (alpaca-py makes one each)
+        return _build_session()
+
+    @cached_property
+    def _pool(self) -> ThreadPoolExecutor:
+        # Worker threads for fanning out independent REST calls
+        return ThreadPoolExecutor(max_workers=8)
+
+    def _attach(self, client):
+        client._session = self._session
+        # retries live in the session's urllib3 Retry; alpaca-py's own
+        # 429/504 loop on top of it would multiply the attempts
+        client._retry = 0
+        return client
+
+    @cached_property
+    def _trade(self) -> TradingClient:
+        """Trading & account client."""
+        return self._attach(
+            TradingClient(self._api_key, self._secret, paper=self._paper))
+
+    @cached_property
+    def _hist(self) -> StockHistoricalDataClient:
+        """Historical (REST) data client."""
+        return self._attach(
+            StockHistoricalDataClient(self._api_key, self._secret))
 
     # -------- internal conversion helpers ----------
     def _as_json(self, obj):
         """Return a JSON-serialisable representation without crashing."""
         if self.raw:
             return obj
-        if hasattr(obj, "model_dump"):             # pydantic BaseModel
-            return obj.model_dump()
-        if isinstance(obj, (dict, list, str, int, float, bool, type(None))):
-            return obj
-        # Raw* containers: convert to dict recursively
-        if hasattr(obj, "__iter__"):
-            try:
-                return {k: self._as_json(v) for k, v in dict(obj).items()}
-            except Exception:
-                pass
-        return obj.__dict__ if hasattr(obj, "__dict__") else obj
+        return _to_json(obj)
+
 
+    def _as_json_list(self, items: Iterable) -> list:
+        """
+        _as_json over a collection, with the per-item dispatch hoisted.
+        In raw mode lists are passed through uncopied (bar lists may be
+        shared with the bar cache, so treat them as read-only).
+        """
+        if self.raw:
+            return items if isinstance(items, list) else list(items)
+        to_json = _to_json
+        return [to_json(obj) for obj in items]
 
     def _side(self, side: str) -> OrderSide:
-        return OrderSide.BUY if side.lower().startswith("b") else OrderSide.SELL
+        # anything not starting with "b" is a sell
+        return _SIDES.get(side[:1].lower(), OrderSide.SELL)
 
     def _tif(self, tif: str | TimeInForce = "day") -> TimeInForce:
         if isinstance(tif, TimeInForce):
             return tif
         # alpaca-py expects the raw value ("day", "gtc", "ioc", "fok"), not uppercase
-        return TimeInForce(tif.lower())
+        return _TIFS.get(tif) or TimeInForce(tif.lower())
 
     # --------------- account / positions ------------------
+    def _account(self):
+        """The alpaca-py Account object, reused for `account_ttl` seconds."""
+        now = time.monotonic()
+        cached = self._acct_cache
+        if cached is not None and now - cached[0] < self._acct_ttl:
+            return cached[1]
+        self._throttle()
+        acct = self._trade.get_account()
+        self._acct_cache = (now, acct)
+        return acct
+
     def get_account_json(self) -> Dict[str, Any]:
-        return self._as_json(self._trade.get_account())
+        return self._as_json(self._account())
+
+    def invalidate_account_cache(self):
+        """Force the next account read to hit the API."""
+        self._acct_cache = None
 
     def get_positions(self) -> List[Dict[str, Any]]:
-        return [self._as_json(p) for p in self._trade.get_all_positions()]
+        self._throttle()
+        return self._as_json_list(self._trade.get_all_positions())
 
     def get_position(self, symbol: str) -> Dict[str, Any]:
+        self._throttle()
         return self._as_json(self._trade.get_position(symbol))
 
     def portfolio_summary(self) -> Dict[str, Any]:
-        acct = self.get_account_json()
-        positions = self.get_positions()
+        f_acct = self._pool.submit(self.get_account_json)
+        f_pos = self._pool.submit(self.get_positions)
+        acct, positions = f_acct.result(), f_pos.result()
         return {
             "cash": acct["cash"],
             "buying_power": acct["buying_power"],
@@ -123,28 +409,54 @@ class SimpleAlpaca:
         }
 
     # --------------- order helpers ------------------------
-    def _submit(self, **kwargs):
-        order = self._trade.submit_order(OrderRequest(**kwargs))
+    def _throttle(self, n: int = 1):
+        """Spend trading-API budget (no-op unless requests_per_minute)."""
+        if self._trade_bucket is not None:
+            self._trade_bucket.take(n)
+
+    def _throttle_data(self, n: int = 1):
+        """Spend market-data budget (no-op unless requests_per_minute)."""
+        if self._data_bucket is not None:
+            self._data_bucket.take(n)
+
+    def _send(self, req: OrderRequest):
+        self._throttle()
+        order = self._trade.submit_order(req)
+        self.invalidate_account_cache()
         return self._as_json(order)
 
+    def _submit(self, **kwargs):
+        return self._send(OrderRequest(**kwargs))
+
+    def _submit_fast(self, symbol: str, qty: float, side: OrderSide,
+                     type_: OrderType, tif: TimeInForce):
+        """
+        Copy a validated per-(side, type, tif) template instead of running
+        the full OrderRequest validation for every identical-shape order.
+        """
+        # model_copy skips validation, so check qty here
+        try:
+            qty = float(qty)
+        except (TypeError, ValueError):
+            raise ValueError("qty must be a number.") from None
+        key = (side, type_, tif)
+        tpl = self._tpl_cache.get(key)
+        if tpl is None:
+            tpl = self._tpl_cache[key] = OrderRequest(
+                symbol="_", qty=1, side=side, type=type_, time_in_force=tif)
+        return self._send(tpl.model_copy(update={"symbol": symbol,
+                                                 "qty": qty}))
+
     # simple one-liners
     def market_buy(self, symbol: str, qty: float,
                    tif: str | TimeInForce = "day") -> Dict[str, Any]:
-        return self._submit(
-            symbol=symbol,
-            qty=qty,
-            side=OrderSide.BUY,
-            type=OrderType.MARKET,
-            time_in_force=self._tif(tif))
+        return self._submit_fast(symbol, qty, OrderSide.BUY,
+                                 OrderType.MARKET, self._tif(tif))
 
     def market_sell(self, symbol: str, qty: float,
                     tif: str | TimeInForce = "day") -> Dict[str, Any]:
-        return self._submit(
-            symbol=symbol,
-            qty=qty,
-            side=OrderSide.SELL,
-            type=OrderType.MARKET,
-            time_in_force=self._tif(tif))
+        return self._submit_fast(symbol, qty, OrderSide.SELL,
+                                 OrderType.MARKET, self._tif(tif))
 
     def limit_order(self, symbol: str, qty: float, limit_price: float,
                     side: str = "buy",
@@ -196,134 +508,631 @@ class SimpleAlpaca:
         """
         return self._submit(**alpaca_order_kwargs)
 
+    def submit_orders(self, orders: Iterable[Dict[str, Any]]
+                      ) -> List[Dict[str, Any] | Exception]:
+        """
+        Submit several orders at once; each item takes the same kwargs as
+        submit_custom_order.  Every order is validated before any is sent.
+
+        Returns one entry per input, in order: the placed order, or the
+        exception that rejected it -- one failure never hides the ids of
+        orders that were accepted.
+
+        With `httpx` + `h2` installed all orders share one persistent
+        HTTP/2 connection; otherwise they go out concurrently on the
+        pooled keep-alive session.
+        """
+        reqs = [OrderRequest(**kw) for kw in orders]
+        if not reqs:
+            return []
+        self._throttle(len(reqs))
+        try:
+            if httpx is not None:
+                results = asyncio.run_coroutine_threadsafe(
+                    self._post_orders_h2(reqs), self._h2_loop).result()
+            else:
+                futures = [self._pool.submit(self._trade.submit_order, r)
+                           for r in reqs]
+                results = [f.exception() or f.result() for f in futures]
+        finally:
+            self.invalidate_account_cache()
+        return [r if isinstance(r, Exception) else self._as_json(r)
+                for r in results]
+
+    @cached_property
+    def _h2_loop(self) -> asyncio.AbstractEventLoop:
+        # long-lived loop owning the HTTP/2 client, so its connection stays warm
+        loop = (uvloop.new_event_loop() if uvloop is not None
+                else asyncio.new_event_loop())
+
+        def run():
+            loop.run_forever()
+            loop.close()
+
+        threading.Thread(target=run, name="SimpleAlpaca-h2",
+                         daemon=True).start()
+        return loop
+
+    @cached_property
+    def _httpx(self) -> "httpx.AsyncClient":
+        return httpx.AsyncClient(
+            http2=True,
+            headers=self._trade._get_default_headers(),
+            limits=httpx.Limits(max_keepalive_connections=8,
+                                max_connections=16),
+            timeout=10.0)
+
+    async def _post_orders_h2(self, reqs: List[OrderRequest]
+                              ) -> List[Order | Exception]:
+        client = self._trade
+        url = client._base_url + "/" + client._api_version + "/orders"
+        session = self._httpx
+
+        async def post(req: OrderRequest) -> Order:
+            response = await session.post(url, json=req.to_request_fields())
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as http_error:
+                raise APIError(response.text, http_error)
+            return Order(**response.json())
+
+        return list(await asyncio.gather(*(post(r) for r in reqs),
+                                         return_exceptions=True))
+
     # cancel / query
-    def cancel_order(self, order_id: str):
+    # order ids: the UUID in a returned order's "id" is passed straight
+    # through, so alpaca-py never re-parses it from a string
+    def cancel_order(self, order_id: str | UUID):
+        self._throttle()
         self._trade.cancel_order_by_id(order_id)
+        self.invalidate_account_cache()
 
     def cancel_all_orders(self):
         """Cancel **every** open order."""
+        self._throttle()
         self._trade.cancel_orders()  # ← no request object
+        self.invalidate_account_cache()
 
     def list_orders(self, status: str = "all",
-                    limit: int = 50) -> List[Dict[str, Any]]:
+                    limit: int = 50,
+                    raw_bytes: bool = False) -> List[Dict[str, Any]] | bytes:
+        """raw_bytes=True returns the undecoded JSON body (see list_assets)."""
+        req = GetOrdersRequest(status=status, limit=limit)
+        self._throttle()
+        if raw_bytes:
+            return self._get_bytes("/orders", req.to_request_fields())
+        return self._as_json_list(self._trade.get_orders(req))
+
+    def iter_orders(self, status: str = "all",
+                    limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """Like list_orders, but converts each order only when consumed."""
         req = GetOrdersRequest(status=status, limit=limit)
-        return [self._as_json(o) for o in self._trade.get_orders(req)]
+        self._throttle()
+        for o in self._trade.get_orders(req):
+            yield self._as_json(o)
+
+    def list_orders_multi(self, statuses: Iterable[str],
+                          limit: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+        """{status: orders}, with one concurrent request per status."""
+        futures = {st: self._pool.submit(self.list_orders, st, limit)
+                   for st in statuses}
+        return {st: f.result() for st, f in futures.items()}
 
-    def get_order(self, order_id: str) -> Dict[str, Any]:
+    def get_order(self, order_id: str | UUID) -> Dict[str, Any]:
+        self._throttle()
         return self._as_json(self._trade.get_order_by_id(order_id))
 
+    # order-state push notifications
+    _FINAL_EVENTS = {TradeEvent.FILL, TradeEvent.CANCELED,
+                     TradeEvent.EXPIRED, TradeEvent.REJECTED}
+
+    def _ensure_trade_stream(self):
+        if self._trade_stream is None:
+            stream = self._trade_stream = TradingStream(
+                self._api_key, self._secret, paper=self._paper)
+            stream.subscribe_trade_updates(self._on_trade_update)
+            threading.Thread(target=lambda: _run_loop(stream._run_forever()),
+                             name="SimpleAlpaca-trade-updates",
+                             daemon=True).start()
+
+    async def _on_trade_update(self, data):
+        if data.event in (TradeEvent.FILL, TradeEvent.PARTIAL_FILL):
+            # cash / buying power moved: don't serve pre-fill figures
+            self.invalidate_account_cache()
+        if data.event not in self._FINAL_EVENTS:
+            return
+        order_id = data.order.id
+        with self._fill_lock:
+            event = self._fill_waiters.get(order_id)
+            if event is not None:
+                self._fill_results[order_id] = data.event
+                event.set()
+
+    def _order_filled(self, order_id: UUID) -> bool:
+        self._throttle()
+        order = self._trade.get_order_by_id(order_id)
+        return order.status == OrderStatus.FILLED
+
+    def wait_for_fill(self, order_id: str | UUID,
+                      timeout: float = 15.0,
+                      poll_interval: float = 1.0) -> bool:
+        """
+        Block until the order fills (True) or is cancelled / rejected /
+        expired / times out (False).
+
+        Fills are pushed over the trade-updates WebSocket; REST polling
+        every `poll_interval` seconds is only used while that stream is
+        not connected.
+        """
+        # parse once; both the REST checks and the stream use the UUID
+        if not isinstance(order_id, UUID):
+            order_id = UUID(order_id)
+        event = threading.Event()
+        with self._fill_lock:
+            self._fill_waiters[order_id] = event
+        try:
+            try:
+                self._ensure_trade_stream()
+            except Exception:
+                pass                        # fall back to polling below
+            deadline = time.monotonic() + timeout
+            while True:
+                # Sample the stream state *before* the REST check: only a
+                # check made while the stream was already listening proves
+                # that any later fill will be pushed, so only then is it
+                # safe to wait out the rest of the timeout.
+                stream = self._trade_stream
+                live = stream is not None and stream._running
+                # also catches fills that landed before the stream was live
+                if self._order_filled(order_id):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if event.wait(remaining if live
+                              else min(poll_interval, remaining)):
+                    return self._fill_results.get(order_id) == TradeEvent.FILL
+        finally:
+            with self._fill_lock:
+                self._fill_waiters.pop(order_id, None)
+                self._fill_results.pop(order_id, None)
+
     # --------------- closing positions --------------------
     def close_position(self, symbol: str):
+        self._throttle()
         self._trade.close_position(symbol)
+        self.invalidate_account_cache()
 
     def close_all_positions(self):
         """Close every open position at market."""
+        self._throttle()
         self._trade.close_all_positions()    # ← no request object
+        self.invalidate_account_cache()
 
     # --------------- assets -------------------------------
     def list_assets(self,
                     status: str = "active",
-                    asset_class: str = "us_equity") -> List[Dict[str, Any]]:
+                    asset_class: str = "us_equity",
+                    raw_bytes: bool = False) -> List[Dict[str, Any]] | bytes:
+        """
+        raw_bytes=True skips building ~11k pydantic models and returns the
+        JSON body as bytes, e.g. for a fast C decoder:
+            assets = orjson.loads(api.list_assets(raw_bytes=True))
+        """
+        req = GetAssetsRequest(status=status, asset_class=asset_class)
+        self._throttle()
+        if raw_bytes:
+            return self._get_bytes("/assets", req.to_request_fields())
+        return self._as_json_list(self._trade.get_all_assets(req))
+
+    def iter_assets(self,
+                    status: str = "active",
+                    asset_class: str = "us_equity") -> Iterator[Dict[str, Any]]:
+        """
+        Like list_assets, but converts each asset only when consumed, so a
+        search can stop early without dumping the other ~11k models:
+            any(a["symbol"] == "AAPL" for a in api.iter_assets())
+        """
         req = GetAssetsRequest(status=status, asset_class=asset_class)
-        return [self._as_json(a) for a in self._trade.get_all_assets(req)]
+        self._throttle()
+        for a in self._trade.get_all_assets(req):
+            yield self._as_json(a)
+
+    def _get_bytes(self, path: str, params: Dict[str, Any]) -> bytes:
+        """GET a trading endpoint on the shared session, body undecoded."""
+        client = self._trade
+        url = client._base_url + "/" + client._api_version + path
+        response = client._session.get(url,
+                                       params=params,
+                                       headers=client._get_default_headers(),
+                                       allow_redirects=False)
+        try:
+            response.raise_for_status()
+        except HTTPError as http_error:
+            raise APIError(response.text, http_error)
+        return response.content
 
     # --------------- market-data helpers ------------------
-    def _tf_parse(self, timeframe: str | int,
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _tf_parse(timeframe: str | int,
                   unit: TimeFrameUnit | str = TimeFrameUnit.Minute) -> TimeFrame:
         """
-        Accept '1Min', '5Min', '1Day' or numeric interval + unit.
+        Accept '1Min', '5Min', '1Hour', '1Day' or numeric interval + unit.
         """
         if isinstance(timeframe, str):
-            num = int(''.join(filter(str.isdigit, timeframe)))
-            unit_str = ''.join(filter(str.isalpha, timeframe)).lower()
-            unit = {
-                "min": TimeFrameUnit.Minute,
-                "hour": TimeFrameUnit.Hour,
-                "day": TimeFrameUnit.Day
-            }[unit_str[:3]]
-            return TimeFrame(num, unit)
+            m = _TF_RE.fullmatch(timeframe.strip())
+            unit = m and _UNIT_MAP.get(m[2].lower()[:3])
+            if unit is None:
+                raise ValueError(f"Unrecognised timeframe: {timeframe!r}")
+            return TimeFrame(int(m[1]), unit)
         return TimeFrame(int(timeframe), unit)
 
-    def get_last_quote(self, symbol: str) -> Dict[str, Any]:
-        req = StockLatestQuoteRequest(symbol_or_symbols=symbol)
-        data = self._hist.get_stock_latest_quote(req)
-        quote = (
-            data.quote  # single-symbol RawLatestQuote
-            if hasattr(data, "quote") else
-            next(iter(data.values()))  # dict{sym: Quote}
-        )
-        return self._as_json(quote)
-
-    def get_last_trade(self, symbol: str) -> Dict[str, Any]:
-        req = StockLatestTradeRequest(symbol_or_symbols=symbol)
-        data = self._hist.get_stock_latest_trade(req)
-        trade = (
-            data.trade  # single-symbol RawLatestTrade
-            if hasattr(data, "trade") else
-            next(iter(data.values()))
-        )
-        return self._as_json(trade)
+    @staticmethod
+    def _symbol_chunks(symbols: List[str]) -> Iterable[List[str]]:
+        for i in range(0, len(symbols), _MAX_SYMBOLS_PER_REQUEST):
+            yield symbols[i:i + _MAX_SYMBOLS_PER_REQUEST]
+
+    def get_last_quote(self, symbol: Union[str, Iterable[str]]
+                       ) -> Dict[str, Any]:
+        """
+        Latest quote for one symbol, or {symbol: quote} when given several
+        (fetched in one request per 200 symbols).
+        """
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        quotes = {}
+        chunks = list(self._symbol_chunks(symbols))
+        self._throttle_data(len(chunks))
+        for chunk in chunks:
+            req = StockLatestQuoteRequest(symbol_or_symbols=chunk)
+            data = self._hist.get_stock_latest_quote(req)
+            quotes.update({s: self._as_json(q) for s, q in data.items()})
+        return quotes[symbol] if isinstance(symbol, str) else quotes
+
+    def get_last_trade(self, symbol: Union[str, Iterable[str]]
+                       ) -> Dict[str, Any]:
+        """
+        Latest trade for one symbol, or {symbol: trade} when given several
+        (fetched in one request per 200 symbols).
+        """
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        trades = {}
+        chunks = list(self._symbol_chunks(symbols))
+        self._throttle_data(len(chunks))
+        for chunk in chunks:
+            req = StockLatestTradeRequest(symbol_or_symbols=chunk)
+            data = self._hist.get_stock_latest_trade(req)
+            trades.update({s: self._as_json(t) for s, t in data.items()})
+        return trades[symbol] if isinstance(symbol, str) else trades
 
     def get_last_bar(self, symbol: str,
                      timeframe: str | int = "1Min") -> Dict[str, Any]:
+        # `limit` counts bars across all symbols, so this stays per-symbol
         tf = self._tf_parse(timeframe)
-        bars = self._hist.get_stock_bars(symbol, tf, limit=1)
-        return self._as_json(bars[-1])
+        req = StockBarsRequest(symbol_or_symbols=symbol,
+                               timeframe=tf,
+                               limit=1,
+                               sort=Sort.DESC)
+        self._throttle_data()
+        bars = self._hist.get_stock_bars(req)
+        return self._as_json(bars[symbol][-1])
 
     def get_historical_bars(
             self,
-            symbol: str,
+            symbol: Union[str, Iterable[str]],
             timeframe: str | int,
             start: str | datetime,
             end: str | datetime,
             limit: int | None = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Dict[str, Any]] | Dict[str, List[Dict[str, Any]]]:
+        """
+        Bars for one symbol, or {symbol: bars} when given several.
+        Symbols are fetched 200 per request; note that Alpaca applies
+        `limit` to the total across all symbols in a request.
+        """
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        data = self._fetch_bars(symbols, timeframe, start, end, limit)
+        result = {s: self._as_json_list(data.get(s, []))
+                  for s in symbols}
+        return result[symbol] if isinstance(symbol, str) else result
+
+    def get_historical_bars_df(
+            self,
+            symbol: str,
+            timeframe: str | int,
+            start: str | datetime,
+            end: str | datetime,
+            limit: int | None = None,
+            as_array: bool = False
+    ) -> pd.DataFrame | np.ndarray:
+        """
+        Same bars as get_historical_bars, but column-oriented for
+        indicator math: a DataFrame (open/high/low/close/volume indexed by
+        timestamp) or, with as_array=True, a structured array with fields
+        t/o/h/l/c/v.
+        """
+        bars = self._fetch_bars([symbol], timeframe, start, end, limit
+                                ).get(symbol, [])
+        n = len(bars)
+        ts = pd.DatetimeIndex([b.timestamp for b in bars])
+        cols = {name: np.fromiter((getattr(b, name) for b in bars),
+                                  dtype=np.float64, count=n)
+                for name in ("open", "high", "low", "close", "volume")}
+        if not as_array:
+            return pd.DataFrame(cols, index=ts)
+
+        out = np.empty(n, dtype=_BAR_DTYPE)
+        out["t"] = (ts.tz_localize(None) if ts.tz is not None else ts).values
+        out["o"], out["h"] = cols["open"], cols["high"]
+        out["l"], out["c"] = cols["low"], cols["close"]
+        out["v"] = cols["volume"]
+        return out
 
+    def _fetch_bars(self, symbols: List[str],
+                    timeframe: str | int,
+                    start: str | datetime,
+                    end: str | datetime,
+                    limit: int | None) -> Dict[str, list]:
+        """
+        {symbol: [Bar, ...]} straight from alpaca-py, 200 symbols/request.
+        Results are cached per symbol for a timeframe-dependent TTL, so
+        repeated fetches (SMA, ATR, ... over the same window) hit the API once.
+        """
         tf = self._tf_parse(timeframe)
         start_dt = start if isinstance(start, datetime) else datetime.fromisoformat(start)
         end_dt = end if isinstance(end, datetime) else datetime.fromisoformat(end)
 
-        req = StockBarsRequest(symbol_or_symbols=symbol,
-                               timeframe=tf,
-                               start=start_dt,
-                               end=end_dt,
-                               limit=limit)
-
-        raw = self._hist.get_stock_bars(req)
-        bars = (
-            raw.bars[symbol]  # wrapped object → list[Bar]
-            if hasattr(raw, "bars") else
-            raw[symbol]  # dict
-        )
-        return [self._as_json(b) for b in bars]
+        # a multi-symbol `limit` is shared across symbols, so don't cache it
+        cacheable = limit is None or len(symbols) == 1
+        ttl = _BAR_CACHE_TTL.get(tf.unit_value, 0)
+        key = (tf.value, start_dt, end_dt, limit)
+
+        data = {}
+        missing = symbols
+        if cacheable:
+            now = time.monotonic()
+            missing = []
+            with self._bar_lock:
+                for sym in symbols:
+                    hit = self._bar_cache.get((sym,) + key)
+                    if hit is not None and now - hit[0] < ttl:
+                        self._bar_cache.move_to_end((sym,) + key)
+                        data[sym] = hit[1]
+                    else:
+                        missing.append(sym)
+        if not missing:
+            return data
+
+        fetched = {}
+        chunks = list(self._symbol_chunks(missing))
+        self._throttle_data(len(chunks))
+        for chunk in chunks:
+            req = StockBarsRequest(symbol_or_symbols=chunk,
+                                   timeframe=tf,
+                                   start=start_dt,
+                                   end=end_dt,
+                                   limit=limit)
+            fetched.update(self._hist.get_stock_bars(req).data)
+
+        now = time.monotonic()
+        with self._bar_lock:
+            for sym in missing:
+                data[sym] = fetched.get(sym, [])
+                if cacheable:
+                    self._bar_cache[(sym,) + key] = (now, data[sym])
+                    self._bar_cache.move_to_end((sym,) + key)
+            while len(self._bar_cache) > _BAR_CACHE_SIZE:
+                self._bar_cache.popitem(last=False)
+        return data
+
+    def get_bars_with_indicators(
+            self,
+            symbol: str,
+            timeframe: str | int,
+            start: str | datetime,
+            end: str | datetime,
+            limit: int | None = None,
+            sma_window: int = 20,
+            atr_window: int = 14
+    ) -> Dict[str, Any]:
+        """
+        One bar fetch shared by the common indicators:
+            {"bars": DataFrame, "sma": Series, "atr": Series}
+        """
+        df = self.get_historical_bars_df(symbol, timeframe, start, end, limit)
+        prev_close = df["close"].shift(1)
+        true_range = pd.concat([df["high"] - df["low"],
+                                (df["high"] - prev_close).abs(),
+                                (df["low"] - prev_close).abs()],
+                               axis=1).max(axis=1)
+        return {
+            "bars": df,
+            "sma": df["close"].rolling(sma_window).mean(),
+            "atr": true_range.rolling(atr_window).mean(),
+        }
 
     # --------------- live streaming (optional) ------------
+    _WS_QUEUE_SIZE = 10_000
+
     def _ensure_ws(self):
         if not self._ws:
             self._ws = StockDataStream(self._api_key, self._secret)
 
+    def _start_ws_thread(self):
+        # only once something is subscribed: the stream busy-waits until then
+        if self._ws_thread is None or not self._ws_thread.is_alive():
+            self._ws_thread = threading.Thread(
+                target=lambda: _run_loop(self._ws_main()),
+                name="SimpleAlpaca-market-data",
+                daemon=True)
+            self._ws_thread.start()
+
+    async def _ws_main(self):
+        # Bounded hand-off: a slow consumer pauses the socket reader
+        # instead of growing memory without limit.
+        self._ws_queue = asyncio.Queue(maxsize=self._WS_QUEUE_SIZE)
+        dispatcher = asyncio.create_task(self._ws_dispatch())
+        try:
+            # alpaca-py reconnects with exponential backoff on its own
+            await self._ws._run_forever()
+        finally:
+            dispatcher.cancel()
+
+    async def _on_ws_bar(self, bar):
+        await self._ws_queue.put(bar)
+
+    async def _ws_dispatch(self):
+        while True:
+            bar = await self._ws_queue.get()
+            callback = self._ws_callbacks.get(bar.symbol)
+            if callback is None:
+                continue
+            try:
+                result = callback(self._as_json(bar))
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                log.exception("bar callback failed for %s", bar.symbol)
+
+    def _on_ws_loop(self) -> bool:
+        # True inside a bar callback, i.e. on the stream's own event loop
+        try:
+            return asyncio.get_running_loop() is self._ws._loop
+        except RuntimeError:
+            return False
+
+    def _ws_send(self, coro):
+        # alpaca-py would block the loop waiting on itself; send from a task
+        if self._ws._running:
+            task = self._ws._loop.create_task(coro)
+            self._ws_sends.add(task)
+            task.add_done_callback(self._ws_sends.discard)
+        else:
+            coro.close()
+
+    def subscribe_bars(self, symbols: Iterable[str], callback):
+        """
+        Non-blocking: stream 1-minute bars for `symbols` to callback(bar).
+
+        All symbols share one WebSocket owned by a background thread; adding
+        symbols later reuses it.  `callback` may be a plain function or a
+        coroutine function, and may itself (un)subscribe symbols.
+        """
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        with self._ws_lock:
+            self._ensure_ws()
+            for sym in symbols:
+                self._ws_callbacks[sym] = callback
+        # outside the lock: alpaca-py blocks on the stream loop, which may
+        # itself be waiting for the lock in a callback
+        if self._on_ws_loop():
+            for sym in symbols:
+                self._ws._handlers["bars"][sym] = self._on_ws_bar
+            self._ws_send(self._ws._send_subscribe_msg())
+        else:
+            self._ws.subscribe_bars(self._on_ws_bar, *symbols)
+        with self._ws_lock:
+            self._start_ws_thread()
+
+    def unsubscribe_bars(self, symbols: Iterable[str]):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        with self._ws_lock:
+            symbols = [s for s in symbols if s in self._ws_callbacks]
+            for sym in symbols:
+                del self._ws_callbacks[sym]
+        if not (self._ws and symbols):
+            return
+        if self._on_ws_loop():
+            self._ws_send(self._ws._send_unsubscribe_msg("bars", symbols))
+            for sym in symbols:
+                self._ws._handlers["bars"].pop(sym, None)
+        else:
+            self._ws.unsubscribe_bars(*symbols)
+
     def subscribe_price(self,
                         symbols: Iterable[str],
-                        callback):
+                        callback,
+                        block: bool = True):
         """
         Subscribe to real-time bar updates (1-minute bars) for given symbols.
 
-        callback(price_dict) is called on every bar.
+        callback(price_dict) is called on every bar.  With block=False this
+        is subscribe_bars; otherwise it waits until the stream stops.
         """
-        self._ensure_ws()
-        for sym in symbols:
-            self._ws.subscribe_bars(callback, sym)
-        self._ws.run()  # blocking! run in its own thread if needed
+        self.subscribe_bars(symbols, callback)
+        if block:
+            self._ws_thread.join()
 
     # --------------- quality-of-life ----------------------
+    # read the field off the Account model: no full dict dump per call
     def cash(self) -> float:
-        return float(self.get_account_json()["cash"])
+        return float(self._account().cash)
 
     def buying_power(self) -> float:
-        return float(self.get_account_json()["buying_power"])
+        return float(self._account().buying_power)
+
+    # --------------- cleanup ------------------------------
+    def close(self):
+        """Release pooled HTTP connections and worker threads."""
+        pool = self.__dict__.pop("_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+        h2_client = self.__dict__.pop("_httpx", None)
+        h2_loop = self.__dict__.pop("_h2_loop", None)
+        if h2_loop is not None:
+            if h2_client is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(
+                        h2_client.aclose(), h2_loop).result(timeout=5)
+                except Exception:
+                    pass
+            h2_loop.call_soon_threadsafe(h2_loop.stop)
+        stream = getattr(self, "_trade_stream", None)
+        if stream is not None:
+            try:
+                stream.stop()
+            except Exception:
+                pass
+            self._trade_stream = None
+        ws = getattr(self, "_ws", None)
+        if ws is not None and ws._loop is not None:
+            try:
+                ws.stop()
+            except Exception:
+                pass
+        # drop the clients too, so any later call builds a fresh session
+        for name in ("_trade", "_hist"):
+            self.__dict__.pop(name, None)
+        session = self.__dict__.pop("_session", None)
+        if session is not None:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     # --------------- dunder repr --------------------------
+    @staticmethod
+    def _format_account(acct) -> str:
+        get = acct.get if isinstance(acct, dict) else (lambda k: getattr(acct, k))
+        return (f"<SimpleAlpaca cash=${get('cash')} "
+                f"portfolio=${get('portfolio_value')}>")
+
+    def summary(self) -> str:
+        """Live cash / portfolio figures (one account request if stale)."""
+        return self._format_account(self._account())
+
     def __repr__(self):
-        acct = self.get_account_json()
-        return (f"<SimpleAlpaca cash=${acct['cash']} "
-                f"portfolio=${acct['portfolio_value']}>")
+        # never touches the network: last-fetched figures, if any
+        cached = getattr(self, "_acct_cache", None)
+        if cached is None:
+            return f"<SimpleAlpaca paper={getattr(self, '_paper', None)}>"
+        return self._format_account(cached[1])
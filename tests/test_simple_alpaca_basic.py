@@ -19,6 +19,10 @@ class TestSimpleAlpacaBasic(unittest.TestCase):
         self.assertGreater(len(assets), 0)
         self.assertTrue(any(a["symbol"] == "AAPL" for a in assets))
 
+    def test_iter_assets_finds_symbol(self):
+        self.assertTrue(
+            any(a["symbol"] == "AAPL" for a in self.api.iter_assets()))
+
     def test_last_quote(self):
         quote = self.api.get_last_quote("AAPL")
         self.assertGreater(quote["ask_price"], 0)
@@ -33,6 +37,24 @@ class TestSimpleAlpacaBasic(unittest.TestCase):
         self.assertEqual(len(bars), 5)         # 5 trading days
         self.assertTrue(all("close" in b for b in bars))
 
+    def test_historical_bars_df(self):
+        df = self.api.get_historical_bars_df(
+            "SPY", "1Day", "2023-01-03", "2023-01-10")
+        self.assertEqual(len(df), 5)
+        self.assertListEqual(
+            list(df.columns), ["open", "high", "low", "close", "volume"])
+
+    def test_batched_bars_and_quotes(self):
+        bars = self.api.get_historical_bars(
+            ["SPY", "AAPL"],
+            "1Day",
+            "2023-01-03",
+            "2023-01-10")
+        self.assertEqual(set(bars), {"SPY", "AAPL"})
+        self.assertEqual(len(bars["SPY"]), 5)
+        quotes = self.api.get_last_quote(["SPY", "AAPL"])
+        self.assertTrue(all(q["ask_price"] > 0 for q in quotes.values()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -16,15 +16,10 @@ class TestSimpleAlpacaFlow(unittest.TestCase):
 
     @staticmethod
     def _wait_until_filled(api, order_id, timeout=MAX_WAIT):
-        """Poll order status until `filled` or timeout."""
-        t0 = time.time()
-        last_status = None
-        while time.time() - t0 < timeout:
-            o = api.get_order(order_id)
-            last_status = o["status"]
-            if last_status == "filled":
-                return True
-            time.sleep(1)
+        """Wait for the trade-updates fill event (or timeout)."""
+        if api.wait_for_fill(order_id, timeout=timeout):
+            return True
+        last_status = api.get_order(order_id)["status"]
         raise AssertionError(
             f"Order {order_id} did not fill within {timeout}s, last status: {last_status}"
         )
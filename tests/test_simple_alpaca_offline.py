@@ -0,0 +1,444 @@
+# test_simple_alpaca_offline.py
+# Pure-logic checks that need no Alpaca keys or network access.
+import asyncio, json, threading, time, types, unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from alpaca.common.exceptions import APIError
+from alpaca.data.models import Bar, BarSet
+from alpaca.data.timeframe import TimeFrameUnit
+from alpaca.trading.enums import OrderSide, OrderStatus, OrderType, TradeEvent
+from alpaca.trading.requests import OrderRequest
+from src import simple_alpaca
+from src.simple_alpaca import SimpleAlpaca, TokenBucket, RateLimited
+
+ORDER_KW = dict(qty=1, side="buy", type="market", time_in_force="day")
+
+
+def _order_json(symbol):
+    return {"id": "61e69015-8549-4bfd-b9c3-01e75843f47d",
+            "client_order_id": "c", "created_at": "2023-01-03T14:30:00Z",
+            "updated_at": "2023-01-03T14:30:00Z",
+            "submitted_at": "2023-01-03T14:30:00Z",
+            "asset_id": "b0b6dd9d-8b9b-48a9-ba46-b9d54906e415",
+            "symbol": symbol, "asset_class": "us_equity", "qty": "1",
+            "filled_qty": "0", "order_class": "simple", "order_type": "market",
+            "type": "market", "side": "buy", "time_in_force": "day",
+            "status": "accepted", "extended_hours": False}
+
+
+class _AlwaysRateLimited(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = b'{"code": 42910000, "message": "rate limit exceeded"}'
+        self.send_response(429)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTimeframeParsing(unittest.TestCase):
+    def test_strings(self):
+        cases = {"1Min": (1, TimeFrameUnit.Minute),
+                 "15Min": (15, TimeFrameUnit.Minute),
+                 "1Hour": (1, TimeFrameUnit.Hour),   # used to raise KeyError
+                 "1Day": (1, TimeFrameUnit.Day),
+                 "1Week": (1, TimeFrameUnit.Week),
+                 "1Month": (1, TimeFrameUnit.Month)}
+        for text, (amount, unit) in cases.items():
+            tf = SimpleAlpaca._tf_parse(text)
+            self.assertEqual((tf.amount_value, tf.unit_value), (amount, unit))
+
+    def test_numeric_with_unit(self):
+        tf = SimpleAlpaca._tf_parse(5)
+        self.assertEqual(tf.value, "5Min")
+
+    def test_bad_input_is_a_value_error(self):
+        for text in ("abc", "Min", "1Sec", "5m", "1H"):
+            with self.assertRaises(ValueError, msg=text):
+                SimpleAlpaca._tf_parse(text)
+
+
+class TestSession(unittest.TestCase):
+    def test_exhausted_retries_return_the_response(self):
+        # a RetryError from requests would bypass alpaca-py's APIError
+        retry = simple_alpaca._build_session().adapters["https://"].max_retries
+        self.assertFalse(retry.raise_on_status)
+        self.assertIn(429, retry.status_forcelist)
+
+
+class TestRetryLayering(unittest.TestCase):
+    def setUp(self):
+        _AlwaysRateLimited.hits = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _AlwaysRateLimited)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.api = SimpleAlpaca("key", "secret", paper=True)
+        # route the trading client at the local server, without backoff sleeps
+        adapter = self.api._session.adapters["https://"]
+        adapter.max_retries = adapter.max_retries.new(backoff_factor=0,
+                                                      backoff_jitter=0)
+        self.api._session.mount("http://", adapter)
+        self.api._trade._base_url = "http://127.0.0.1:%d" % self.server.server_port
+
+    def tearDown(self):
+        self.api.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_exhausted_retries_raise_api_error_once_per_layer(self):
+        with self.assertRaises(APIError) as ctx:
+            self.api.get_account_json()
+        self.assertEqual(ctx.exception.status_code, 429)
+        # 1 attempt + 5 urllib3 retries; alpaca-py must not retry on top
+        self.assertEqual(_AlwaysRateLimited.hits, 6)
+
+    def test_rate_limited_orders_are_retried(self):
+        # a 429 means the order was not accepted, so POST is retried too
+        with self.assertRaises(APIError) as ctx:
+            self.api.market_buy("SPY", 1)
+        self.assertEqual(ctx.exception.status_code, 429)
+        self.assertEqual(_AlwaysRateLimited.hits, 6)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.simple_alpaca.time.monotonic",
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bucket = TokenBucket(rate=2.0, capacity=4)
+
+    def test_spends_up_to_capacity_then_raises(self):
+        self.bucket.take(4)
+        with self.assertRaises(RateLimited) as ctx:
+            self.bucket.take(1)
+        self.assertAlmostEqual(ctx.exception.retry_after, 0.5)
+
+    def test_failed_take_spends_nothing(self):
+        self.bucket.take(3)
+        with self.assertRaises(RateLimited):
+            self.bucket.take(2)
+        self.bucket.take(1)
+
+    def test_refills_at_rate_capped_at_capacity(self):
+        self.bucket.take(4)
+        self.now += 1.0                         # 2 tokens back
+        self.bucket.take(2)
+        self.now += 60.0                        # refill caps at capacity
+        self.bucket.take(4)
+        with self.assertRaises(RateLimited):
+            self.bucket.take(1)
+
+    def test_request_larger_than_capacity_is_a_value_error(self):
+        with self.assertRaises(ValueError):
+            self.bucket.take(5)
+
+
+class TestThrottling(unittest.TestCase):
+    def test_disabled_by_default(self):
+        api = SimpleAlpaca("key", "secret")
+        self.assertIsNone(api._trade_bucket)
+        self.assertIsNone(api._data_bucket)
+
+    def test_trading_and_data_budgets_are_separate(self):
+        api = SimpleAlpaca("key", "secret", requests_per_minute=1)
+        api._trade.get_orders = lambda req: []
+        api._hist.get_stock_latest_quote = lambda req: {}
+        api.list_orders()
+        api.get_last_quote(["SPY"])             # own budget, still allowed
+        with self.assertRaises(RateLimited):
+            api.get_order("61e69015-8549-4bfd-b9c3-01e75843f47d")
+
+
+class TestLifecycle(unittest.TestCase):
+    @staticmethod
+    def _stub(api):
+        api._trade.get_account = lambda: {
+            "cash": "1", "buying_power": "2", "portfolio_value": "3"}
+        api._trade.get_all_positions = lambda: []
+
+    def test_usable_after_close(self):
+        with SimpleAlpaca("key", "secret") as api:
+            self._stub(api)
+            api.portfolio_summary()
+        # clients, session and workers are rebuilt on demand after close()
+        self._stub(api)
+        self.assertEqual(api.portfolio_summary()["cash"], "1")
+        api.close()
+
+class TestSubmitOrders(unittest.TestCase):
+    def test_partial_failure_keeps_accepted_orders(self):
+        api = SimpleAlpaca("key", "secret")
+        self.addCleanup(api.close)
+
+        def submit(req):
+            if req.symbol == "BAD":
+                raise APIError('{"code": 1, "message": "rejected"}')
+            return {"symbol": req.symbol}
+
+        api._trade.submit_order = submit
+        with mock.patch.object(simple_alpaca, "httpx", None):
+            results = api.submit_orders(
+                [dict(symbol=s, **ORDER_KW) for s in ("SPY", "BAD", "QQQ")])
+        self.assertEqual(results[0], {"symbol": "SPY"})
+        self.assertIsInstance(results[1], APIError)
+        self.assertEqual(results[2], {"symbol": "QQQ"})
+
+    @unittest.skipUnless(simple_alpaca.httpx, "httpx[http2] not installed")
+    def test_http2_path_reuses_one_client_and_reports_per_order(self):
+        import httpx
+
+        def handler(request):
+            symbol = json.loads(request.content)["symbol"]
+            if symbol == "BAD":
+                return httpx.Response(422, text='{"code": 1, "message": "no"}')
+            return httpx.Response(200, json=_order_json(symbol))
+
+        api = SimpleAlpaca("key", "secret")
+        self.addCleanup(api.close)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        api.__dict__["_httpx"] = client
+
+        first = api.submit_orders([dict(symbol="SPY", **ORDER_KW),
+                                   dict(symbol="BAD", **ORDER_KW)])
+        second = api.submit_orders([dict(symbol="QQQ", **ORDER_KW)])
+        self.assertEqual(first[0]["symbol"], "SPY")
+        self.assertEqual(first[1].status_code, 422)
+        self.assertEqual(second[0]["symbol"], "QQQ")
+        self.assertIs(api._httpx, client)
+
+
+class TestWaitForFill(unittest.TestCase):
+    ORDER_ID = "61e69015-8549-4bfd-b9c3-01e75843f47d"
+
+    def setUp(self):
+        self.api = SimpleAlpaca("key", "secret")
+        self.addCleanup(self.api.close)
+        self.stream = types.SimpleNamespace(_running=False)
+        self.api._trade_stream = self.stream
+        self.api._ensure_trade_stream = lambda: None
+
+    def test_fill_while_stream_connects_is_not_missed(self):
+        # the fill lands after the first REST check but before the stream
+        # is listening, so no push ever arrives for it
+        statuses = iter([OrderStatus.NEW])
+
+        def get_order(order_id):
+            self.stream._running = True
+            return types.SimpleNamespace(
+                status=next(statuses, OrderStatus.FILLED))
+
+        self.api._trade.get_order_by_id = get_order
+        t0 = time.monotonic()
+        self.assertTrue(self.api.wait_for_fill(self.ORDER_ID, timeout=5,
+                                               poll_interval=0.05))
+        self.assertLess(time.monotonic() - t0, 1.0)
+
+    def test_fill_push_invalidates_account_cache(self):
+        self.api._acct_cache = (time.monotonic(), object())
+        update = types.SimpleNamespace(
+            event=TradeEvent.FILL,
+            order=types.SimpleNamespace(id=self.ORDER_ID))
+        asyncio.run(self.api._on_trade_update(update))
+        self.assertIsNone(self.api._acct_cache)
+
+
+class TestBarCache(unittest.TestCase):
+    START, END = "2023-01-03", "2023-01-10"
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.simple_alpaca.time.monotonic",
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = SimpleAlpaca("key", "secret")
+        self.addCleanup(self.api.close)
+        self.requests = []
+        self.api._hist.get_stock_bars = self._get_stock_bars
+
+    def _get_stock_bars(self, req):
+        symbols = req.symbol_or_symbols
+        self.requests.append(list(symbols))
+        return BarSet({s: [{"t": f"2023-01-0{d}T05:00:00Z", "o": 10 + d,
+                            "h": 12 + d, "l": 9 + d, "c": 11 + d,
+                            "v": 100, "n": 1, "vw": 11}
+                           for d in range(3, 8)]
+                       for s in symbols})
+
+    def bars(self, symbols, timeframe="1Day", limit=None):
+        return self.api.get_historical_bars(symbols, timeframe,
+                                            self.START, self.END, limit)
+
+    def test_repeat_fetch_hits_cache(self):
+        first = self.bars("SPY")
+        self.assertEqual(self.bars("SPY"), first)
+        self.assertEqual(self.requests, [["SPY"]])
+
+    def test_only_missing_symbols_are_fetched(self):
+        self.bars("SPY")
+        result = self.bars(["SPY", "QQQ"])
+        self.assertEqual(set(result), {"SPY", "QQQ"})
+        self.assertEqual(self.requests, [["SPY"], ["QQQ"]])
+
+    def test_entries_expire_by_timeframe(self):
+        self.bars("SPY", "1Min")
+        self.bars("SPY", "1Day")
+        self.now += 5 * 60 + 1                  # past the minute-bar TTL
+        self.bars("SPY", "1Min")
+        self.bars("SPY", "1Day")                # daily bars still fresh
+        self.assertEqual(self.requests, [["SPY"]] * 3)
+
+    def test_lru_eviction(self):
+        with mock.patch.object(simple_alpaca, "_BAR_CACHE_SIZE", 2):
+            self.bars("SPY")
+            self.bars("QQQ")
+            self.bars("SPY")                    # SPY is now most recent
+            self.bars("IWM")                    # evicts QQQ
+            self.bars("SPY")
+            self.bars("QQQ")
+        self.assertEqual(self.requests,
+                         [["SPY"], ["QQQ"], ["IWM"], ["QQQ"]])
+        self.assertEqual(len(self.api._bar_cache), 2)
+
+    def test_multi_symbol_limit_is_not_cached(self):
+        self.bars(["SPY", "QQQ"], limit=3)
+        self.bars(["SPY", "QQQ"], limit=3)
+        self.bars("SPY", limit=3)
+        self.bars("SPY", limit=3)
+        self.assertEqual(self.requests,
+                         [["SPY", "QQQ"], ["SPY", "QQQ"], ["SPY"]])
+
+    def test_indicators_share_one_fetch(self):
+        out = self.api.get_bars_with_indicators(
+            "SPY", "1Day", self.START, self.END, sma_window=2, atr_window=2)
+        self.assertEqual(len(out["bars"]), 5)
+        self.assertEqual(out["sma"].tolist()[1:], [14.5, 15.5, 16.5, 17.5])
+        # high-low is 3 every day and gaps never exceed it
+        self.assertEqual(out["atr"].tolist()[1:], [3.0] * 4)
+        self.bars("SPY")
+        self.assertEqual(self.requests, [["SPY"]])
+
+
+def _bar(symbol):
+    return Bar(symbol, {"t": "2023-01-03T05:00:00Z", "o": 1, "h": 2, "l": 0.5,
+                        "c": 1.5, "v": 100, "n": 3, "vw": 1.2})
+
+
+class TestBarStream(unittest.TestCase):
+    def setUp(self):
+        self.api = SimpleAlpaca("key", "secret", paper=True)
+        self.addCleanup(self.api.close)
+        self.api._ensure_ws()
+
+    async def _feed(self, bars):
+        # run the dispatcher on the current loop until every bar is handled
+        api = self.api
+        api._ws_queue = asyncio.Queue()
+        done = asyncio.Event()
+        api._ws_callbacks["END"] = lambda bar: done.set()
+        dispatcher = asyncio.create_task(api._ws_dispatch())
+        for bar in bars + [_bar("END")]:
+            await api._on_ws_bar(bar)
+        await asyncio.wait_for(done.wait(), 1)
+        dispatcher.cancel()
+
+    def test_routes_by_symbol_to_sync_and_async_callbacks(self):
+        spy, qqq = [], []
+
+        async def on_qqq(bar):
+            qqq.append(bar)
+
+        self.api._ws_callbacks.update(SPY=spy.append, QQQ=on_qqq)
+        asyncio.run(self._feed([_bar("SPY"), _bar("QQQ"), _bar("IWM"),
+                                _bar("SPY")]))
+        self.assertEqual([b["symbol"] for b in spy], ["SPY", "SPY"])
+        self.assertEqual([b["symbol"] for b in qqq], ["QQQ"])
+
+    def test_failing_callback_does_not_stop_dispatch(self):
+        qqq = []
+
+        def boom(bar):
+            raise RuntimeError("boom")
+
+        self.api._ws_callbacks.update(SPY=boom, QQQ=qqq.append)
+        with self.assertLogs(simple_alpaca.log, "ERROR"):
+            asyncio.run(self._feed([_bar("SPY"), _bar("QQQ")]))
+        self.assertEqual(len(qqq), 1)
+
+    def test_unsubscribe_drops_callbacks(self):
+        spy = []
+        self.api._ws.unsubscribe_bars = mock.Mock()
+        self.api._ws_callbacks.update(SPY=spy.append, QQQ=spy.append)
+        self.api.unsubscribe_bars(["SPY", "IWM"])
+        self.api._ws.unsubscribe_bars.assert_called_once_with("SPY")
+        self.assertEqual(list(self.api._ws_callbacks), ["QQQ"])
+        asyncio.run(self._feed([_bar("SPY")]))
+        self.assertEqual(spy, [])
+
+    def test_callback_can_resubscribe_without_blocking_the_loop(self):
+        api, ws, qqq = self.api, self.api._ws, []
+        api._start_ws_thread = mock.Mock()
+        ws._send_subscribe_msg = mock.AsyncMock()
+        ws._send_unsubscribe_msg = mock.AsyncMock()
+
+        def on_spy(bar):
+            api.subscribe_bars("QQQ", qqq.append)
+            api.unsubscribe_bars("SPY")
+
+        async def run():
+            ws._loop, ws._running = asyncio.get_running_loop(), True
+            api.subscribe_bars("SPY", on_spy)
+            await self._feed([_bar("SPY"), _bar("QQQ")])
+            await asyncio.sleep(0)
+            ws._loop, ws._running = None, False
+
+        # alpaca-py's blocking subscribe would hang the loop forever
+        worker = threading.Thread(target=asyncio.run, args=(run(),), daemon=True)
+        worker.start()
+        worker.join(2)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(qqq), 1)
+        self.assertEqual(list(ws._handlers["bars"]), ["QQQ"])
+        self.assertEqual(ws._send_subscribe_msg.await_count, 2)
+        ws._send_unsubscribe_msg.assert_awaited_once_with("bars", ["SPY"])
+
+
+class TestMarketOrderTemplates(unittest.TestCase):
+    def setUp(self):
+        self.api = SimpleAlpaca("key", "secret", paper=True)
+        self.addCleanup(self.api.close)
+        self.sent = []
+        self.api._trade.submit_order = lambda req: self.sent.append(req) or req
+
+    def test_template_copy_matches_a_validated_request(self):
+        for place, side in ((self.api.market_buy, OrderSide.BUY),
+                            (self.api.market_sell, OrderSide.SELL)):
+            for tif in ("day", "gtc"):
+                place("SPY", 3, tif=tif)
+                expected = OrderRequest(symbol="SPY", qty=3, side=side,
+                                        type=OrderType.MARKET,
+                                        time_in_force=tif)
+                self.assertEqual(self.sent[-1].to_request_fields(),
+                                 expected.to_request_fields())
+
+    def test_bad_qty_raises_value_error(self):
+        for qty in (None, "lots"):
+            with self.assertRaises(ValueError):
+                self.api.market_buy("SPY", qty)
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()